@@ -1,13 +1,99 @@
 # app_web.py
+import os
+from functools import lru_cache
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from typing import List
 
+# Polars (optional): much faster columnar CSV load + cleaning when installed
+try:
+    import polars as pl
+    _HAVE_POLARS = True
+except Exception:
+    _HAVE_POLARS = False
+
+# PyArrow (optional): multithreaded CSV tokenizer for the pandas fallback
+try:
+    import pyarrow  # noqa: F401
+    _HAVE_PYARROW = True
+except Exception:
+    _HAVE_PYARROW = False
+
+# numexpr (optional): fused elementwise ratio evaluation
+try:
+    import numexpr as ne
+    _HAVE_NUMEXPR = True
+except Exception:
+    _HAVE_NUMEXPR = False
+
+# pyahocorasick (optional): match every keyword against a column name in
+# one automaton scan instead of one substring search per keyword
+try:
+    import ahocorasick
+    _HAVE_AHOCORASICK = True
+except Exception:
+    _HAVE_AHOCORASICK = False
+
+# TextBlob (optional): imported once here so reruns don't retry the import
+# (and the POS tagger load behind it) on every keystroke
+try:
+    from textblob import TextBlob
+    _HAVE_TEXTBLOB = True
+except Exception:
+    _HAVE_TEXTBLOB = False
+
 st.set_page_config(page_title="FinQuery - NL Financial Analyzer", layout="wide")
 
 # ---------- Helpers ----------
-def load_and_transform(path: str) -> pd.DataFrame:
+# single-pass cleanup table: strip thousands separators, turn "(123)" into "-123"
+_NUM_TRANS = str.maketrans({",": "", "(": "-", ")": ""})
+
+
+def _load_and_transform_polars(path: str) -> pd.DataFrame:
+    """
+    Polars fast path for load_and_transform: parse, clean and cast in one
+    columnar pass instead of per-column pandas str.replace chains.
+    Returns a pandas DataFrame so the rest of the app is unchanged.
+    """
+    # infer_schema_length=0 -> read everything as strings, we clean + cast below
+    lf = pl.scan_csv(path, infer_schema_length=0)
+    cols = lf.collect_schema().names()
+    date_like_count = sum(1 for c in cols if "-" in str(c))
+    if date_like_count >= 2:
+        # metrics are rows, years are columns -> transpose
+        raw = lf.collect()
+        # remove any totally empty columns (e.g. trailing commas in exports),
+        # same guard as the pandas fallback's dropna(axis=1, how="all")
+        empty = [c for c in raw.columns if raw[c].is_null().all()]
+        if empty:
+            raw = raw.drop(empty)
+        first_col = raw.columns[0]
+        metric_names = raw[first_col].to_list()
+        df = raw.drop(first_col).transpose(
+            include_header=True, header_name="Year", column_names=metric_names
+        )
+    else:
+        df = lf.collect()
+        if "Year" not in df.columns:
+            df = df.rename({df.columns[0]: "Year"})
+    numeric_cols = [c for c in df.columns if c != "Year"]
+    df = df.with_columns(
+        [
+            pl.col(c)
+            .str.replace_all(",", "", literal=True)
+            .str.replace_all("(", "-", literal=True)
+            .str.replace_all(")", "", literal=True)
+            .cast(pl.Float64, strict=False)
+            for c in numeric_cols
+        ]
+    )
+    return df.to_pandas()
+
+@st.cache_data(show_spinner=False)
+def load_and_transform(path: str, mtime: float = None, dtype: str = "float64") -> pd.DataFrame:
     """
     Load CSV and transform if metrics are rows and years are columns.
     Expected original format (like your file):
@@ -15,55 +101,172 @@ def load_and_transform(path: str) -> pd.DataFrame:
         Total Assets, 88970, 84896,...
     After transform we want:
         Year | Total Assets | Revenue | ...
+
+    Cached by Streamlit so widget interactions don't reparse the CSV;
+    `mtime` is part of the cache key so edits to the file invalidate it.
+    Pass dtype="float32" to halve the memory footprint (7 significant
+    digits is plenty for ledger values); float64 stays the safe default.
     """
-    df = pd.read_csv(path, dtype=str)
-    # If first column header is something like "Unnamed: 0" and years are columns,
-    # we assume metrics are rows and years are columns -> transpose
-    first_col = df.columns[0]
-    # simple heuristic: if many column names look like dates (contain '-'), transpose
-    date_like_count = sum(1 for c in df.columns if "-" in str(c))
-    if date_like_count >= 2:
-        # remove any totally empty columns
-        df = df.dropna(axis=1, how="all")
-        df = df.set_index(first_col).T.reset_index()
-        df = df.rename(columns={"index": "Year"})
+    if _HAVE_POLARS:
+        df = _load_and_transform_polars(path)
     else:
-        # assume already in standard "Year | MetricA | MetricB" format
-        if "Year" not in df.columns:
-            # try to standardize small cases
-            df = df.rename(columns={first_col: "Year"})
-    # convert numeric columns
-    for col in df.columns:
-        if col == "Year":
-            continue
-        df[col] = pd.to_numeric(df[col].str.replace(",", "").str.replace("(", "-").str.replace(")", ""), errors="coerce")
+        if _HAVE_PYARROW:
+            # Arrow tokenizer parses in parallel and stores strings columnar
+            # instead of one PyObject per cell
+            df = pd.read_csv(path, dtype=str, engine="pyarrow")
+        else:
+            df = pd.read_csv(path, dtype=str)
+        # If first column header is something like "Unnamed: 0" and years are columns,
+        # we assume metrics are rows and years are columns -> transpose
+        first_col = df.columns[0]
+        # simple heuristic: if many column names look like dates (contain '-'), transpose
+        date_like_count = sum(1 for c in df.columns if "-" in str(c))
+        if date_like_count >= 2:
+            # remove any totally empty columns
+            df = df.dropna(axis=1, how="all")
+            df = df.set_index(first_col).T.reset_index()
+            df = df.rename(columns={"index": "Year"})
+        else:
+            # assume already in standard "Year | MetricA | MetricB" format
+            if "Year" not in df.columns:
+                # try to standardize small cases
+                df = df.rename(columns={first_col: "Year"})
+        # convert numeric columns: clean + coerce the whole block, then one
+        # concat with copy=False so the result is a single consolidated
+        # float block instead of per-column writes into the string frame
+        num_block = df.drop(columns=["Year"]).apply(
+            lambda s: pd.to_numeric(s.str.translate(_NUM_TRANS), errors="coerce"))
+        df = pd.concat([df[["Year"]], num_block], axis=1, copy=False)
+    if np.dtype(dtype) != np.float64:
+        num_cols = df.columns.difference(["Year"])
+        df[num_cols] = df[num_cols].astype(np.dtype(dtype), copy=False)
     return df
 
+def ratio_frame(df: pd.DataFrame, name: str, num_col: str, den_col: str) -> pd.DataFrame:
+    """
+    Compute num_col / den_col on a thin throwaway frame. The loaded df is
+    kept immutable: the old in-place column writes leaked derived columns
+    into the metric pickers and column list for the rest of the session.
+    """
+    num = df[num_col].to_numpy()
+    den = df[den_col].to_numpy()
+    if _HAVE_NUMEXPR:
+        ratio = ne.evaluate("num / den")
+    else:
+        ratio = num / den
+    return df[["Year"]].assign(**{name: ratio})
+
+@st.cache_resource(show_spinner=False)
+def make_fig(chart_type: str, cols_key: tuple):
+    """
+    One cached Figure per (chart type, column set). Reruns update the
+    existing artists instead of paying subplots + axis setup again.
+    """
+    fig, ax = plt.subplots(figsize=(9, 5))
+    lines = {}
+    if chart_type.startswith("Line"):
+        for c in cols_key:
+            (lines[c],) = ax.plot([], [], marker='o', label=c)
+    return fig, ax, lines
+
 def find_matching_columns(df: pd.DataFrame, keywords: List[str]) -> List[str]:
-    cols = []
-    for kw in keywords:
-        for col in df.columns:
-            if col == "Year":
-                continue
-            if kw.lower() in col.lower():
-                if col not in cols:
-                    cols.append(col)
-    return cols
+    # lowercase everything once up front; dict keeps insertion order and
+    # gives O(1) dedup instead of a list membership scan per hit
+    lower_cols = [(c, c.lower()) for c in df.columns if c != "Year"]
+    kws = [kw.lower() for kw in keywords]
+    matched = {}
+    if _HAVE_AHOCORASICK and kws:
+        # Aho-Corasick: one O(len(name)) scan per column finds all keywords;
+        # bucket hits per keyword so the result keeps the same keyword-major
+        # order as the fallback loop below
+        auto = ahocorasick.Automaton()
+        for kw in kws:
+            auto.add_word(kw, kw)
+        auto.make_automaton()
+        hits = {kw: [] for kw in kws}
+        for col, low in lower_cols:
+            for _, kw in auto.iter(low):
+                if col not in hits[kw]:
+                    hits[kw].append(col)
+        for kw in kws:
+            for col in hits[kw]:
+                matched.setdefault(col, None)
+        return list(matched)
+    for kw in kws:
+        for col, low in lower_cols:
+            if kw in low:
+                matched.setdefault(col, None)
+    return list(matched)
 
+@lru_cache(maxsize=256)
 def simple_nl_to_keywords(text: str) -> List[str]:
-    # Try TextBlob if available for better nouns, otherwise simple tokenization
-    try:
-        from textblob import TextBlob
-        blob = TextBlob(text)
-        nouns = [w for (w, pos) in blob.tags if pos.startswith("NN")]
-        if nouns:
-            return nouns
-    except Exception:
-        pass
+    # Memoized: Streamlit reruns this for the same query text on every
+    # widget interaction, and POS tagging is the expensive part
+    if _HAVE_TEXTBLOB:
+        try:
+            blob = TextBlob(text)
+            nouns = [w for (w, pos) in blob.tags if pos.startswith("NN")]
+            if nouns:
+                return nouns
+        except Exception:
+            pass
     # fallback: split and keep words longer than 3 chars
     tokens = [t.strip().lower() for t in text.replace(",", " ").split() if len(t.strip()) > 3]
     return tokens
 
+@st.fragment
+def render_chart(source: pd.DataFrame, chosen_cols: List[str]):
+    """
+    Chart + table panel, scoped as a fragment: tweaking the plot-option
+    widgets below reruns only this block — no CSV reload, no keyword
+    re-extraction, no column re-matching.
+    """
+    with st.expander("Plot options", expanded=False):
+        chart_type = st.selectbox("Chart type", ["Line (default)", "Bar"])
+        smooth = st.checkbox("Smooth (rolling mean)", value=False)
+        window = st.slider("Rolling window (if smoothing)", min_value=2, max_value=5, value=3)
+        use_mpl = st.checkbox("Use matplotlib renderer (for export)", value=False)
+
+    # prepare data for plotting (ratio frames already carry their column)
+    plot_df = source[["Year"] + chosen_cols].copy()
+    # try to convert Year to readable form (keep as string for x-axis)
+    # apply smoothing if requested — one rolling pass over the whole
+    # block instead of one per column
+    if smooth and chosen_cols:
+        plot_df[chosen_cols] = plot_df[chosen_cols].rolling(window=window, min_periods=1).mean()
+
+    if not use_mpl:
+        # Native Streamlit charts ship the data as Arrow and render
+        # client-side — no server-side rasterization, no PNG over the wire
+        chart_fn = st.line_chart if chart_type.startswith("Line") else st.bar_chart
+        chart_fn(plot_df.set_index("Year")[chosen_cols])
+    else:
+        # matplotlib fallback (nicer for PDF/PNG export) — figure is
+        # cached per (chart type, columns), reruns update artists in place
+        x = plot_df["Year"]
+        fig, ax, lines = make_fig(chart_type, tuple(chosen_cols))
+        if chart_type.startswith("Line"):
+            for c in chosen_cols:
+                lines[c].set_data(range(len(x)), plot_df[c].to_numpy())
+            ax.relim()
+            ax.autoscale_view()
+        else:
+            # bar artists aren't cheaply updatable; rebuild them in place
+            ax.clear()
+            for c in chosen_cols:
+                ax.bar([f"{i}_{c}" for i in range(len(x))], plot_df[c], label=c)
+        ax.set_xticks(range(len(x)))
+        ax.set_xticklabels(x, rotation=45, ha="right")
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Value")
+        ax.set_title(" vs ".join(chosen_cols))
+        ax.legend(loc='best', fontsize='small')
+        st.pyplot(fig)
+
+    # show data
+    st.markdown("### Data Table")
+    st.dataframe(plot_df.style.format(precision=2, na_rep="-"))
+
 # ---------- UI ----------
 st.title("📊 FinQuery — NL Financial Data Analyzer")
 st.markdown("Ask simple English questions or use controls on the left. Supports transposed financial CSVs (metrics as rows).")
@@ -77,29 +280,19 @@ with st.sidebar:
     st.markdown("**Quick tips**")
     st.write("- Put your CSV in `data/` folder.")
     st.write("- If your file has metrics in rows (like your sample), app will transpose automatically.")
-    st.markdown("---")
-    st.subheader("Plot options")
-    chart_type = st.selectbox("Chart type", ["Line (default)", "Bar"])
-    smooth = st.checkbox("Smooth (rolling mean)", value=False)
-    window = st.slider("Rolling window (if smoothing)", min_value=2, max_value=5, value=3)
-
-# Load data
-if "df" not in st.session_state:
-    st.session_state.df = None
-
-if load_btn or st.session_state.df is None:
-    try:
-        df = load_and_transform(data_path)
-        st.session_state.df = df
-        st.success("✅ Data loaded.")
-    except FileNotFoundError:
-        st.error(f"CSV not found at `{data_path}`. Put file in project folder or correct the path.")
-        st.stop()
-    except Exception as e:
-        st.error(f"Error loading CSV: {e}")
-        st.stop()
-else:
-    df = st.session_state.df
+    st.write("- Plot options live in the chart panel so tweaking them only redraws the chart.")
+
+# Load data (cached — reruns hit the cache unless the path or file changed)
+if load_btn:
+    load_and_transform.clear()
+try:
+    df = load_and_transform(data_path, os.path.getmtime(data_path))
+except FileNotFoundError:
+    st.error(f"CSV not found at `{data_path}`. Put file in project folder or correct the path.")
+    st.stop()
+except Exception as e:
+    st.error(f"Error loading CSV: {e}")
+    st.stop()
 
 # show columns & quick data preview
 st.subheader("Available Columns")
@@ -120,25 +313,26 @@ with left_col:
 
     st.markdown("---")
     st.subheader("Derived Ratios (Quick)")
+    ratio_df = None
     if st.button("Debt-to-Equity ratio"):
         if "Total Liabilities" in df.columns and "Total Equity" in df.columns:
-            df["Debt_to_Equity"] = df["Total Liabilities"] / df["Total Equity"]
-            multi = ["Debt_to_Equity"]
+            ratio_df = ratio_frame(df, "Debt_to_Equity", "Total Liabilities", "Total Equity")
         else:
             st.warning("Columns named 'Total Liabilities' and 'Total Equity' required for this ratio.")
     if st.button("Current Ratio (Current Assets / Current Liabilities)"):
         if "Total Current Assets" in df.columns and "Total Current Liabilities" in df.columns:
-            df["Current_Ratio"] = df["Total Current Assets"] / df["Total Current Liabilities"]
-            multi = ["Current_Ratio"]
+            ratio_df = ratio_frame(df, "Current_Ratio", "Total Current Assets", "Total Current Liabilities")
         else:
             st.warning("Need 'Total Current Assets' and 'Total Current Liabilities' columns.")
 
 with right_col:
     st.subheader("Chart & Table")
 
-    # Determine which columns to show (NL or manual)
+    # Determine which columns to show (ratio button, NL or manual)
     chosen_cols = []
-    if user_q and user_q.strip():
+    if ratio_df is not None:
+        chosen_cols = [c for c in ratio_df.columns if c != "Year"]
+    elif user_q and user_q.strip():
         keywords = simple_nl_to_keywords(user_q)
         st.write("🧩 Detected keywords:", keywords)
         matches = find_matching_columns(df, keywords)
@@ -154,33 +348,8 @@ with right_col:
     if not chosen_cols:
         st.info("Select metrics on the left or type a query.")
     else:
-        # prepare data for plotting
-        plot_df = df[["Year"] + chosen_cols].copy()
-        # try to convert Year to readable form (keep as string for x-axis)
-        # apply smoothing if requested
-        if smooth and len(chosen_cols) > 0:
-            for c in chosen_cols:
-                plot_df[c] = plot_df[c].rolling(window=window, min_periods=1).mean()
-
-        # Plot with matplotlib
-        fig, ax = plt.subplots(figsize=(9, 5))
-        x = plot_df["Year"]
-        for c in chosen_cols:
-            if chart_type.startswith("Line"):
-                ax.plot(x, plot_df[c], marker='o', label=c)
-            else:
-                ax.bar([f"{i}_{c}" for i in range(len(x))], plot_df[c], label=c)
-        ax.set_xticks(range(len(x)))
-        ax.set_xticklabels(x, rotation=45, ha="right")
-        ax.set_xlabel("Year")
-        ax.set_ylabel("Value")
-        ax.set_title(" vs ".join(chosen_cols))
-        ax.legend(loc='best', fontsize='small')
-        st.pyplot(fig)
-
-        # show data
-        st.markdown("### Data Table")
-        st.dataframe(plot_df.style.format(precision=2, na_rep="-"))
+        source = ratio_df if ratio_df is not None else df
+        render_chart(source, chosen_cols)
 
 # footer / help
 st.markdown("---")